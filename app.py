@@ -23,14 +23,24 @@ Tips
 
 import os
 import re
-import io
+import hashlib
+import heapq
+import tempfile
 import time
-from typing import List, Tuple, Set, Deque, Optional
-from urllib.parse import urljoin, urldefrag, urlparse, unquote, quote
-from collections import deque
+import threading
+from datetime import timedelta
+from typing import List, Tuple, Set, Dict, Iterator, Optional, Union
+from urllib.parse import urljoin, urlparse, unquote, quote
+from functools import lru_cache
+from itertools import islice
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup, NavigableString, Tag
+import lxml.html
+from lxml import etree
 
 try:
     from readability import Document  # optional
@@ -39,6 +49,13 @@ try:
 except Exception:  # ImportError or others
     Document = None  # type: ignore
     _READABILITY_OK = False
+try:
+    import requests_cache  # optional: persistent HTTP cache
+
+    _REQUESTS_CACHE_OK = True
+except Exception:
+    requests_cache = None  # type: ignore
+    _REQUESTS_CACHE_OK = False
 from ebooklib import epub
 import streamlit as st
 
@@ -47,10 +64,152 @@ DEBUG = False
 APP_TITLE = "eBanglaLibrary → EPUB"
 # Define output directory in a cross-platform way
 OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "output")
+# Tags that never carry article content; removed wholesale by sanitize_article_html
+_KILL_TAGS = frozenset(
+    {"script", "style", "noscript", "form", "iframe", "header", "footer", "nav", "aside"}
+)
+# Tags inspected by the text-based navigation/bookmark rules in sanitize_article_html
+_NAV_CANDIDATE_TAGS = frozenset({"a", "p", "div", "ul", "ol", "li", "button", "span"})
+# Elements by common id/class/role patterns
+_PATTERNS = re.compile(
+    r"(comment|comments|respond|reply|share|breadcrumb|sidebar|widget|meta|advert|ad-)",
+    re.I,
+)
+# Blocks that are clearly comment prompts by text (their parent is removed)
+_BAD_TEXT = re.compile(r"(leave a comment|মন্তব্য|কমেন্ট|প্রতিক্রিয়া|respond)", re.I)
+# Nav-like blocks such as "Bookmark", "Back to Book", "Next Lesson" etc.
+_NAV_TEXT = re.compile(
+    r"(bookmark|\*?bookmark\*?|বুকমার্ক|back to book|next lesson|previous lesson|prev lesson|next|prev|পূর্ববর্তী|পরবর্তী)",
+    re.I,
+)
+# Lone "Bookmark" buttons/links, including star variants
+_BOOKMARK_EXACT = re.compile(r"^\s*(বুকমার্ক|bookmark)(?:\s*[☆★]?)\s*$", re.I)
+_BOOKMARK_IDCLS = re.compile(r"bookmark", re.I)
+# File extensions of non-HTML assets, skipped by _clean_link
+_ASSET_EXTS = frozenset(
+    {"jpg", "jpeg", "png", "gif", "svg", "pdf", "zip", "rar", "7z", "mp3", "mp4", "avi", "webm"}
+)
+# Index and book paths on the site (matched against decoded URL paths)
+_BOOKS_IDX_RE = re.compile(r"^/books/(?:page/\d+/?)?$")
+_AUTHORS_IDX_RE = re.compile(r"^/authors/(?:page/\d+/?)?$")
+_AUTHOR_DETAIL_RE = re.compile(r"^/authors/[^/]+/(?:page/\d+/?)?$")
+_BOOK_PATH_RE = re.compile(r"/books?/")
+# All anchor hrefs as plain strings, collected in one C-level traversal
+_HREF_XPATH = etree.XPath("//a/@href", smart_strings=False)
+# Any markup tag, for cheap text-length estimates on serialized HTML
+_TAG_RE = re.compile(r"<[^>]+>")
+# Words marking an edited collection ("edited", "editor", "editing")
+_EDITED_TOKENS = ("সম্পাদিত", "সম্পাদক", "সম্পাদনা")
+# Inline elements; derive_author_full reads the text of the enclosing block instead
+_INLINE_TAGS = frozenset(
+    {"a", "b", "i", "u", "em", "strong", "span", "font", "small", "big", "sub", "sup", "mark"}
+)
+# Fallback content containers for extract_content, as (tag name, attrs) selectors
+_CONTENT_CLASS_RE = re.compile(r"(post|entry|content|article|chapter|chap)", re.I)
+_CONTENT_SECTION_RE = re.compile(r"content|chapter|chap", re.I)
+_CONTENT_CANDIDATES = (
+    ("article", {}),
+    ("main", {}),
+    ("div", {"class": _CONTENT_CLASS_RE}),
+    ("section", {"class": _CONTENT_SECTION_RE}),
+)
+# Cover candidates whose URL contains any of these are site furniture, not covers
+_BAD_IMG_SUBSTR = (
+    "logo",
+    "favicon",
+    "sprite",
+    "ads",
+    "advert",
+    "banner",
+    "placeholder",
+    "wp-includes",
+    "/themes/",
+    "comment",
+    "emoji",
+    "gravatar",
+    "profile",
+    "avatar",
+    "share",
+    "social",
+    "button",
+    "icon",
+)
+_BAD_IMG_URL = re.compile("|".join(map(re.escape, _BAD_IMG_SUBSTR)))
+# Path separators to fullwidth look-alikes, NULs dropped (fs_safe_basename_from_title)
+_FS_TABLE = str.maketrans({"/": "／", "\\": "＼", "\x00": None})
 SESSION_HEADERS = {
     "User-Agent": "Mozilla/5.0 (X11; Linux x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124 Safari/537.36"
 }
 
+# One pooled HTTP session for every request: all pages live on the same host, so keep-alive
+# reuses the TCP/TLS connection instead of paying a fresh handshake per chapter.
+# Retries (429 honouring Retry-After, transient 5xx, connection errors) are handled by the adapter.
+# With requests-cache installed, responses are also kept in an SQLite file next to the EPUBs so
+# reruns and new Streamlit sessions read unchanged pages from disk instead of the network.
+HTTP_CACHE_PATH = os.path.join(OUTPUT_DIR, "http_cache.sqlite")
+# Chapter pages practically never change; index, author and book (TOC) pages gain new
+# entries, so they expire sooner. Expired entries that carry an ETag or
+# Last-Modified are revalidated with a conditional GET (a 304 costs only a round trip).
+HTTP_CACHE_DEFAULT_TTL = timedelta(hours=1)
+HTTP_CACHE_URL_TTLS = {
+    "*/lessons/*": timedelta(days=7),
+    "*/topics/*": timedelta(days=7),
+}
+if _REQUESTS_CACHE_OK:
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    SESSION = requests_cache.CachedSession(
+        HTTP_CACHE_PATH,
+        backend="sqlite",
+        expire_after=HTTP_CACHE_DEFAULT_TTL,
+        urls_expire_after=HTTP_CACHE_URL_TTLS,
+        allowable_codes=[200],
+    )
+else:
+    SESSION = requests.Session()
+SESSION.headers.update(SESSION_HEADERS)
+# Books processed at once in batch mode (each one also fetches its own pages)
+BATCH_WORKERS = 4
+# Parallel downloads used by fetch_many / fetch_ordered
+FETCH_WORKERS = 8
+# Requests that can be in flight at once: every batch worker downloading its chapters plus its
+# background cover download. The pool keeps that many connections per host, so none is opened
+# only to be discarded afterwards ("connection pool is full")
+HTTP_POOL_SIZE = BATCH_WORKERS * (FETCH_WORKERS + 1)
+_HTTP_ADAPTER = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=HTTP_POOL_SIZE,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=[429, 500, 502, 503, 504],
+        respect_retry_after_header=True,
+    ),
+)
+SESSION.mount("https://", _HTTP_ADAPTER)
+SESSION.mount("http://", _HTTP_ADAPTER)
+# Cover candidates bypass the HTTP cache: requests-cache reads the whole body of every
+# cacheable response, which would defeat the streamed size/type checks in _download_image and
+# store rejected images. Same adapter, so the pooled connections are still shared.
+IMAGE_SESSION = requests.Session()
+IMAGE_SESSION.headers.update(SESSION_HEADERS)
+IMAGE_SESSION.mount("https://", _HTTP_ADAPTER)
+IMAGE_SESSION.mount("http://", _HTTP_ADAPTER)
+# (connect, read) timeout: an unreachable host fails fast, a slow page still gets 30 s
+HTTP_TIMEOUT = (5, 30)
+# Cover candidates larger than this are skipped instead of being downloaded in full
+MAX_COVER_BYTES = 5 * 1024 * 1024
+# Images declaring a smaller Content-Length are icons/thumbnails, not covers
+MIN_COVER_BYTES = 10 * 1024
+# An <article>/<main> with more text than this is used as-is, without running readability
+FAST_CONTENT_CHARS = 2000
+# ebooklib writer options: no EPUB3 page-list (no page map is ever set), raise on write
+# errors instead of returning False, and deflate level 5 (about a third less CPU than the
+# default 6 for a few percent larger files)
+EPUB_WRITE_OPTIONS = {"epub3_pages": False, "raise_exceptions": True, "compresslevel": 5}
+# Minimum seconds between redraws of the status line and progress bar; every redraw is a
+# message to the browser, and cached pages can be processed many times per second
+STATUS_INTERVAL = 0.2
+
 st.set_page_config(page_title=APP_TITLE, page_icon="📚", layout="wide")
 st.title("📚 eBanglaLibrary → EPUB")
 st.caption(
@@ -58,65 +217,162 @@ st.caption(
 )
 
 
-@st.cache_data(show_spinner=False)
-def fetch_html(url: str) -> str:
+# Chapter pages (same URLs as the 7-day HTTP cache TTL) are also kept in memory for the life
+# of the server process, so a chapter reached from several modes or reruns skips even the
+# disk-cache lookup and decode. Index, author and book (TOC) pages are not: they gain new
+# entries, so they always go through the HTTP cache and its 1-hour TTL.
+_MEMO_URL_MARKERS = ("/lessons/", "/topics/")
+
+
+def _download_html(url: str) -> str:
     """Download a URL and return the decoded HTML text.
 
-    - Uses a desktop browser User-Agent to avoid basic bot-blocks
-    - Retries on HTTP 429 using Retry-After header when available
-    - Retries transient 5xx errors and network exceptions with exponential backoff
+    - Goes through the shared pooled SESSION (keep-alive, desktop browser User-Agent)
+    - Retries on HTTP 429 (honouring Retry-After), transient 5xx errors and network
+      exceptions with exponential backoff via the session's retry adapter
     - Sets encoding to apparent_encoding to preserve Bangla text correctly
-    - Cached by Streamlit within a session to avoid repeated network calls
+    - Served from the persistent HTTP cache when requests-cache is installed
+    - Safe to call from worker threads (no Streamlit calls)
     """
-    def _parse_retry_after(val: Optional[str]) -> float:
-        if not val:
-            return 0.0
-        try:
-            # integer seconds
-            return max(0.0, float(val.strip()))
-        except Exception:
-            pass
-        # HTTP-date
-        from email.utils import parsedate_to_datetime
-        from datetime import datetime, timezone
-        try:
-            dt = parsedate_to_datetime(val)
-            if dt.tzinfo is None:
-                dt = dt.replace(tzinfo=timezone.utc)
-            now = datetime.now(timezone.utc)
-            return max(0.0, (dt - now).total_seconds())
-        except Exception:
-            return 0.0
+    resp = SESSION.get(url, timeout=HTTP_TIMEOUT)
+    resp.raise_for_status()
+    resp.encoding = resp.apparent_encoding or resp.encoding
+    return resp.text
 
-    attempt = 0
-    backoff = 1.0
-    last_exc: Optional[Exception] = None
-    while attempt <= 3:
-        try:
-            resp = requests.get(url, headers=SESSION_HEADERS, timeout=30)
-            if resp.status_code == 429:
-                retry_after = _parse_retry_after(resp.headers.get("Retry-After"))
-                wait_s = retry_after if retry_after > 0 else min(60.0, backoff)
-                time.sleep(wait_s)
-                attempt += 1
-                backoff *= 2
-                continue
-            if 500 <= resp.status_code < 600:
-                time.sleep(min(30.0, backoff))
-                attempt += 1
-                backoff *= 2
+
+_memo_download_html = lru_cache(maxsize=1024)(_download_html)
+
+
+def fetch_html(url: str) -> str:
+    """Decoded HTML of a URL (see _download_html); chapter pages are memoized in process."""
+    if any(m in url for m in _MEMO_URL_MARKERS):
+        return _memo_download_html(url)
+    return _download_html(url)
+
+
+def fetch_many(urls: List[str], max_workers: int = FETCH_WORKERS) -> Dict[str, str]:
+    """Download several pages concurrently and return {url: html} for the ones that succeeded.
+
+    Pages are fetched on a small thread pool over the shared SESSION, so N pages cost roughly
+    the slowest response instead of the sum of all of them. Failed URLs are left out; callers
+    fall back to fetch_html for those, which raises and lets them report the error.
+    """
+    unique = list(dict.fromkeys(urls))
+    results: Dict[str, str] = {}
+    if not unique:
+        return results
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(unique))) as ex:
+        futures = {ex.submit(fetch_html, u): u for u in unique}
+        for fut in as_completed(futures):
+            try:
+                results[futures[fut]] = fut.result()
+            except Exception:
                 continue
-            resp.raise_for_status()
-            resp.encoding = resp.apparent_encoding or resp.encoding
-            return resp.text
-        except requests.RequestException as e:
-            last_exc = e
-            time.sleep(min(30.0, backoff))
-            attempt += 1
-            backoff *= 2
-    if last_exc:
-        raise last_exc
-    raise RuntimeError("HTTP request failed after retries")
+    return results
+
+
+def fetch_ordered(
+    urls: List[str], max_workers: int = FETCH_WORKERS
+) -> Iterator[Tuple[str, Optional[str]]]:
+    """Download pages concurrently and yield (url, html or None on failure) in input order.
+
+    Unlike fetch_many, each page is handed over as soon as it and the pages before it are in,
+    so the caller parses early chapters while later ones are still downloading. Abandoning
+    the iterator cancels the downloads that have not started yet.
+    """
+    if not urls:
+        return
+    ex = ThreadPoolExecutor(max_workers=min(max_workers, len(urls)))
+    try:
+        futures: Dict[str, Future] = {}
+        for u in urls:
+            if u not in futures:
+                futures[u] = ex.submit(fetch_html, u)
+        for u in urls:
+            try:
+                yield u, futures[u].result()
+            except Exception:
+                yield u, None
+    finally:
+        ex.shutdown(wait=False, cancel_futures=True)
+
+
+def _in_background(fn, *args) -> Future:
+    """Start fn(*args) on its own short-lived thread and return the Future for its result."""
+    ex = ThreadPoolExecutor(max_workers=1)
+    try:
+        return ex.submit(fn, *args)
+    finally:
+        ex.shutdown(wait=False)
+
+
+class RateLimiter:
+    """Thread-safe per-host pacing: wait(url) calls for the same host return at least
+    `interval` seconds apart; different hosts do not delay each other.
+
+    Unlike sleeping after every request, time already spent downloading and parsing counts
+    toward the interval, so only the remainder is waited (and nothing after the last request).
+    """
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._next: Dict[str, float] = {}  # netloc -> earliest start of its next slot
+        self._lock = threading.Lock()
+
+    def wait(self, url: str) -> None:
+        host = _url_netloc(url)
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next.get(host, 0.0))
+            self._next[host] = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def _content_digest(content_html: str) -> bytes:
+    """Digest of a chapter's extracted content (as returned by extract_content).
+
+    Two URLs serving the same chapter give the same digest even if the page chrome around it
+    (nav links, counters, sidebars) differs. Text, numbers and image sources all count, so
+    chapters differing only in their chapter number or their scanned pages stay distinct.
+    """
+    return hashlib.blake2b(content_html.encode("utf-8"), digest_size=16).digest()
+
+
+def _should_skip_url(u: str) -> bool:
+    """True for image URLs that are clearly not covers (logos, icons, ads, svg/gif)."""
+    u = (u or "").lower()
+    return bool(_BAD_IMG_URL.search(u)) or u.endswith((".svg", ".gif"))
+
+
+def _download_image(img_url: str) -> Optional[bytes]:
+    """Stream an image and return its bytes, or None if it is not an image or its size is off.
+
+    The content type and any declared Content-Length (outside MIN_COVER_BYTES..MAX_COVER_BYTES)
+    are checked before any of the body is read, and reading stops once the size passes
+    MAX_COVER_BYTES, so wrong candidates (HTML error pages, icons, huge scans) cost a response
+    header instead of a full download.
+    """
+    with IMAGE_SESSION.get(img_url, stream=True, timeout=HTTP_TIMEOUT) as resp:
+        resp.raise_for_status()
+        if not resp.headers.get("content-type", "").startswith("image/"):
+            return None
+        try:
+            declared = int(resp.headers.get("content-length") or 0)
+        except ValueError:
+            declared = 0
+        if declared and not MIN_COVER_BYTES <= declared <= MAX_COVER_BYTES:
+            return None
+        # Chunks are joined once at the end: a growing bytearray would be reallocated as it
+        # grows and then copied again into the returned bytes
+        chunks: List[bytes] = []
+        size = 0
+        for chunk in resp.iter_content(chunk_size=64 * 1024):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size > MAX_COVER_BYTES:
+                return None
+        return b"".join(chunks)
 
 
 def extract_cover_image(html: str, base_url: str) -> Optional[Tuple[str, bytes]]:
@@ -127,45 +383,19 @@ def extract_cover_image(html: str, base_url: str) -> Optional[Tuple[str, bytes]]
     - Returns (absolute_image_url, image_bytes) or None
     """
     try:
-        soup = BeautifulSoup(html, "lxml")
+        # Only read from the page, so the bare lxml tree is enough (no soup needed)
+        tree = _parse_tree(html)
+        if tree is None:
+            return None
         if DEBUG:
             st.info("Debug: Parsed HTML for cover extraction")
         cover_candidates = []
         if DEBUG:
             st.info("Debug: Starting cover candidate collection")
 
-        # Helpers
-        def _should_skip_url(u: str) -> bool:
-            u = (u or "").lower()
-            bad_sub = [
-                "logo",
-                "favicon",
-                "sprite",
-                "ads",
-                "advert",
-                "banner",
-                "placeholder",
-                "wp-includes",
-                "/themes/",
-                "comment",
-                "emoji",
-                "gravatar",
-                "profile",
-                "avatar",
-                "share",
-                "social",
-                "button",
-                "icon",
-            ]
-            if any(s in u for s in bad_sub):
-                return True
-            if u.endswith(".svg") or u.endswith(".gif"):
-                return True
-            return False
-
         # Look for preload links and return after first successful download
-        for link in soup.find_all("link", rel="preload"):
-            if link.get("as") == "image":
+        for link in tree.iter("link"):
+            if "preload" in (link.get("rel") or "").split() and link.get("as") == "image":
                 if DEBUG:
                     st.info("Debug: Found preload link")
                 img_url = None
@@ -184,13 +414,9 @@ def extract_cover_image(html: str, base_url: str) -> Optional[Tuple[str, bytes]]
                             st.info(
                                 f"Debug: Attempting to download first preloaded cover from {img_url}"
                             )
-                        img_resp = requests.get(
-                            img_url, headers=SESSION_HEADERS, timeout=30
-                        )
-                        img_resp.raise_for_status()
-                        content_type = img_resp.headers.get("content-type", "")
-                        if content_type.startswith("image/"):
-                            return img_url, img_resp.content
+                        img_data = _download_image(img_url)
+                        if img_data:
+                            return img_url, img_data
                     except Exception:
                         continue
         # Fallback: Look for images in the first few paragraphs only if no better candidates (low priority)
@@ -198,8 +424,8 @@ def extract_cover_image(html: str, base_url: str) -> Optional[Tuple[str, bytes]]
         if not cover_candidates:
             if DEBUG:
                 st.info("Debug: No preload candidates, entering fallback")
-            for i, p in enumerate(soup.find_all("p")[:3]):  # Only first 3 paragraphs
-                for img in p.find_all("img"):
+            for i, p in enumerate(islice(tree.iter("p"), 3)):  # Only first 3 paragraphs
+                for img in p.iter("img"):
                     src = img.get("src")
                     if src:
                         cover_candidates.append((src, 3, "Image in first paragraphs"))
@@ -242,20 +468,13 @@ def extract_cover_image(html: str, base_url: str) -> Optional[Tuple[str, bytes]]
                     st.info(f"Debug: Attempting to download cover from {img_url}")
                 if DEBUG:
                     st.info(f"Pulling the cover image for the book from: {img_url}")
-                # Download the image
-                img_resp = requests.get(img_url, headers=SESSION_HEADERS, timeout=30)
-                if DEBUG:
-                    st.info(f"Debug: Download status code: {img_resp.status_code}")
-                img_resp.raise_for_status()
-
-                # Check if it's actually an image
-                content_type = img_resp.headers.get("content-type", "")
+                # Download the image (None if it is not an image or too large)
+                img_data = _download_image(img_url)
                 if DEBUG:
                     st.info(
-                        f"Debug: Content-Type: {content_type}, Size: {len(img_resp.content)} bytes"
+                        f"Debug: Downloaded {len(img_data) if img_data else 0} image bytes"
                     )
-                if content_type.startswith("image/"):
-                    img_data = img_resp.content
+                if img_data:
                     if DEBUG:
                         st.info("Debug: Successful image download")
                     return img_url, img_data
@@ -269,8 +488,45 @@ def extract_cover_image(html: str, base_url: str) -> Optional[Tuple[str, bytes]]
         return None
 
 
+# Pure functions of the page HTML: cached so Streamlit reruns don't redo the parsing
+@st.cache_data(show_spinner=False, max_entries=256)
 def extract_content(url: str, html: str) -> Tuple[str, str]:
-    """Return (title, clean_html) using readability (if available), then fallback selectors."""
+    """Return (title, clean_html) using readability (if available), then fallback selectors.
+
+    Each HTML string is parsed once: the cleaned fragment is sanitized, de-duplicated and
+    measured on the same soup, and the fallback works on the chosen node without re-parsing it.
+
+    Readability is skipped for tiny pages (redirect stubs, error pages) and for pages whose
+    <article>/<main> already holds more than FAST_CONTENT_CHARS of text; that container is
+    used directly, which avoids readability's own parse and scoring pass.
+    """
+    if len(html) < 2000:
+        return _extract_content_fallback(html)
+
+    tree = _parse_tree(html)
+    if tree is not None:
+        fast = tree.find(".//article")
+        if fast is None:
+            fast = tree.find(".//main")
+        if fast is not None and len(_node_text(fast, "")) > FAST_CONTENT_CHARS:
+            # The container's own first heading (WordPress' <h1 class="entry-title">) is the
+            # chapter title; otherwise the page's first h1/h2/<title>
+            title_el = next(fast.iter("h1", "h2"), None)
+            if title_el is None:
+                title_el = next(tree.iter("h1", "h2", "title"), None)
+            title = (_node_text(title_el, "") if title_el is not None else "") or "Untitled"
+            # make_epub adds its own <h1>{title}, so the title heading is dropped here (as in
+            # readability's output); drop_tree keeps any text that follows it
+            want = _norm_text(title)
+            for h in list(fast.iter("h1", "h2", "h3")):
+                if h is title_el or _norm_text(_node_text(h)) == want:
+                    h.drop_tree()
+            # with_tail=False: text after </article> is not part of the chapter
+            fragment = _sanitize_soup(
+                lxml.html.tostring(fast, encoding="unicode", with_tail=False)
+            )
+            return title, strip_redundant_headings(title, fragment)
+
     # Try readability first if available
     if _READABILITY_OK and Document is not None:
         try:
@@ -278,173 +534,173 @@ def extract_content(url: str, html: str) -> Tuple[str, str]:
             title = doc.short_title() or "Untitled"
             content_html = doc.summary(html_partial=True)
             if content_html:
-                cleaned = sanitize_article_html(content_html)
-                cleaned = strip_redundant_headings(title, cleaned)
-                if len(BeautifulSoup(cleaned, "lxml").get_text(strip=True)) > 150:
+                fragment = _sanitize_soup(content_html)
+                cleaned = strip_redundant_headings(title, fragment)
+                # Rough text length straight from the markup (entities count as several chars)
+                if len(_TAG_RE.sub("", cleaned).strip()) > 150:
                     return title, cleaned
         except Exception:
             pass
 
+    return _extract_content_fallback(html)
+
+
+def _extract_content_fallback(html: str) -> Tuple[str, str]:
+    """Pick the largest common content container, or the whole body, for extract_content."""
     # Fallback: try common content containers
     soup = BeautifulSoup(html, "lxml")
     title_tag = soup.find(["h1", "h2", "title"]) or soup.title
     title = title_tag.get_text(strip=True) if title_tag else "Untitled"
 
-    candidates = [
-        {"name": "article", "score": 2},
-        {"name": "main", "score": 2},
-        {
-            "name": "div",
-            "attrs": {
-                "class": re.compile(r"(post|entry|content|article|chapter|chap)", re.I)
-            },
-        },
-        {
-            "name": "section",
-            "attrs": {"class": re.compile(r"content|chapter|chap", re.I)},
-        },
-    ]
-    best = None
-    for cand in candidates:
-        nodes = soup.find_all(cand.get("name"), cand.get("attrs", {}))
-        for n in nodes:
-            text_len = len(n.get_text(strip=True))
-            if text_len > 300 and (best is None or text_len > best[0]):
-                best = (text_len, n)
-    if best is not None:
-        cleaned = sanitize_article_html(str(best[1]))
-        cleaned = strip_redundant_headings(title, cleaned)
-        return title, cleaned
+    # Measure each candidate once by summing its stripped strings, without building the
+    # concatenated text; a node matched by several selectors is only measured once
+    cand_nodes: List[Tag] = []
+    lengths: Dict[int, int] = {}
+    for name, attrs in _CONTENT_CANDIDATES:
+        for n in soup.find_all(name, attrs):
+            if id(n) not in lengths:
+                lengths[id(n)] = sum(len(s) for s in n.stripped_strings)
+                cand_nodes.append(n)
+    best = max(cand_nodes, key=lambda n: lengths[id(n)], default=None)
+    if best is not None and lengths[id(best)] > 300:
+        return title, strip_redundant_headings(title, _sanitize_soup(best))
 
     # Last resort: whole body
     body = soup.body or soup
-    cleaned = sanitize_article_html(str(body))
-    cleaned = strip_redundant_headings(title, cleaned)
-    return title, cleaned
+    return title, strip_redundant_headings(title, _sanitize_soup(body))
+
 
+def _as_soup(fragment: Union[str, Tag]) -> BeautifulSoup:
+    """Return a BeautifulSoup that can be modified in place.
+
+    Strings are parsed; a BeautifulSoup is used as-is; any other Tag is detached from its
+    document and moved into an empty soup (no re-parse), which mirrors parsing str(tag).
+    """
+    if isinstance(fragment, BeautifulSoup):
+        return fragment
+    if isinstance(fragment, Tag):
+        soup = BeautifulSoup("", "lxml")
+        soup.append(fragment.extract())
+        return soup
+    return BeautifulSoup(fragment, "lxml")
 
-def sanitize_article_html(html_fragment: str) -> str:
+
+def _inner_html(soup: BeautifulSoup) -> str:
+    """Serialize a fragment soup: the inner HTML of <body> if present, else the whole soup."""
+    body = soup.body
+    return "".join(str(c) for c in body.contents) if body else str(soup)
+
+
+def sanitize_article_html(html_fragment: Union[str, Tag]) -> str:
     """Remove non-content elements like comments, forms, footers, and common boilerplate.
 
+    Accepts an HTML string or an already-parsed Tag (modified in place, see _as_soup).
     Returns a cleaned HTML fragment string.
     """
-    soup = BeautifulSoup(html_fragment, "lxml")
-
-    # Remove obvious non-content tags entirely
-    for tag in soup.find_all(
-        [
-            "script",
-            "style",
-            "noscript",
-            "form",
-            "iframe",
-            "header",
-            "footer",
-            "nav",
-            "aside",
-        ]
-    ):
-        tag.decompose()
+    return _inner_html(_sanitize_soup(html_fragment))
 
-    # Remove elements by common id/class patterns
-    patterns = re.compile(
-        r"(comment|comments|respond|reply|share|breadcrumb|sidebar|widget|meta|advert|ad-)",
-        re.I,
-    )
-    for el in soup.find_all(True):
-        try:
-            el_id = ""
-            el_classes = []
-            el_role = ""
-            if hasattr(el, "get"):
-                el_id = el.get("id") or ""
-                el_classes_raw = el.get("class")
-                el_classes = el_classes_raw if isinstance(el_classes_raw, list) else []
-                el_role = el.get("role") or ""
-            attrs = " ".join([el_id, " ".join(el_classes), el_role])
-            if patterns.search(attrs or ""):
-                el.decompose()
-        except Exception:
-            continue
 
-    # Remove blocks that are clearly comment prompts by text (decompose unique parents once)
-    bad_text_re = re.compile(r"(leave a comment|মন্তব্য|কমেন্ট|প্রতিক্রিয়া|respond)", re.I)
-    parents_to_remove_ids: Set[int] = set()
-    parents_to_remove: List = []
-    for el in soup.find_all(string=bad_text_re):  # 'string' is the preferred arg
-        parent = getattr(el, "parent", None)
-        if parent is None:
-            continue
-        pid = id(parent)
-        if pid in parents_to_remove_ids:
-            continue
-        parents_to_remove_ids.add(pid)
-        parents_to_remove.append(parent)
-    for node in parents_to_remove:
-        try:
-            node.decompose()
-        except Exception:
-            pass
+def _sanitize_soup(html_fragment: Union[str, Tag]) -> BeautifulSoup:
+    """Clean a fragment in place for sanitize_article_html and return the soup.
 
-    # Remove anchors to comment sections
-    for a in soup.find_all("a", href=True):
-        href = a["href"]
-        if any(x in href for x in ["#respond", "#comments", "?replytocom="]):
-            a.decompose()
+    Removal rules are evaluated in two tree walks instead of one find_all() scan per rule:
+    first structural rules (tags, id/class/role, comment prompts), then text-based nav rules
+    on the pruned tree so their length checks see the content without boilerplate. Matching
+    nodes are decomposed as soon as they match; the walk is pre-order, so a node's subtree is
+    still intact when its own rules are checked.
+    """
+    soup = _as_soup(html_fragment)
 
-    # Remove nav-like blocks such as "Bookmark", "Back to Book", "Next Lesson" etc.
-    nav_text_re = re.compile(
-        r"(bookmark|\*?bookmark\*?|বুকমার্ক|back to book|next lesson|previous lesson|prev lesson|next|prev|পূর্ববর্তী|পরবর্তী)",
-        re.I,
-    )
-    # Remove anchors with only nav text
-    for a in list(soup.find_all("a")):
-        txt = a.get_text(" ", strip=True).lower()
-        if txt and nav_text_re.search(txt):
-            try:
-                # If parent contains mostly nav text, drop parent; else drop link
-                parent = a.parent
-                if parent and len(parent.get_text(" ", strip=True)) <= len(txt) + 20:
-                    parent.decompose()
-                else:
-                    a.decompose()
-            except Exception:
-                continue
-    # Remove small blocks that contain only nav text
-    for tag_name in ["p", "div", "ul", "ol", "li"]:
-        for el in list(soup.find_all(tag_name)):
-            try:
-                t = el.get_text(" ", strip=True)
-                # Short and clearly a navigation snippet
-                if t and len(t) <= 60 and nav_text_re.search(t):
-                    el.decompose()
-            except Exception:
-                continue
+    def _walk(root, visit) -> None:
+        """Pre-order walk calling visit(node, mark) on each node. mark(node) decomposes the node
+        right away; nodes inside a removed subtree are skipped through their decomposed flag."""
 
-    # Explicitly remove lone "Bookmark" buttons/links, including star variants
-    bookmark_exact = re.compile(r"^\s*(বুকমার্ক|bookmark)(?:\s*[☆★]?)\s*$", re.I)
-    for tag_name in ["button", "a", "span", "div", "p"]:
-        for el in list(soup.find_all(tag_name)):
+        def _mark(node) -> None:
+            if node is None or node.decomposed:
+                return
             try:
-                txt = el.get_text(" ", strip=True)
-                id_cls = " ".join([el.get("id", ""), " ".join(el.get("class") or [])])
-                if bookmark_exact.match(txt) or re.search(r"bookmark", id_cls, re.I):
-                    # If this is inside a larger container that has only this control, drop the container
-                    parent = el.parent
-                    if (
-                        parent
-                        and len(
-                            (parent.get_text(" ", strip=True) or "")
-                            .replace(txt, "")
-                            .strip()
-                        )
-                        == 0
-                    ):
-                        parent.decompose()
-                    else:
-                        el.decompose()
+                node.decompose()
             except Exception:
+                pass
+
+        stack = list(reversed(root.contents))
+        while stack:
+            node = stack.pop()
+            if node.decomposed:
                 continue
+            if visit(node, _mark) and isinstance(node, Tag):
+                stack.extend(reversed(node.contents))
+
+    def _structural(el, mark) -> bool:
+        """Walk 1: tags, attributes and comment prompts. Returns True to descend."""
+        if not isinstance(el, Tag):
+            # Comment prompts by text: drop the enclosing block
+            if isinstance(el, NavigableString) and _BAD_TEXT.search(el):
+                mark(el.parent)
+            return False
+        # Obvious non-content tags
+        if el.name in _KILL_TAGS:
+            mark(el)
+            return False
+        # Common id/class/role boilerplate patterns, matched per value (most tags have no
+        # attributes at all, so they skip this entirely)
+        attrs = el.attrs
+        if attrs:
+            el_id = attrs.get("id")
+            el_role = attrs.get("role")
+            el_classes = attrs.get("class")
+            if (
+                (el_id and _PATTERNS.search(el_id))
+                or (el_role and _PATTERNS.search(el_role))
+                or (
+                    isinstance(el_classes, list)
+                    and any(_PATTERNS.search(c) for c in el_classes)
+                )
+            ):
+                mark(el)
+                return False
+        # Anchors to comment sections
+        if el.name == "a":
+            href = el.get("href")
+            if href is not None and any(x in href for x in ["#respond", "#comments", "?replytocom="]):
+                mark(el)
+                return False
+        return True
+
+    def _navigation(el, mark) -> bool:
+        """Walk 2 (on the pruned tree): nav links, short nav blocks, bookmark controls."""
+        if not isinstance(el, Tag):
+            return False
+        name = el.name
+        if name not in _NAV_CANDIDATE_TAGS:
+            return True
+        txt = el.get_text(" ", strip=True)
+        if name == "a" and txt and _NAV_TEXT.search(txt.lower()):
+            # If parent contains mostly nav text, drop parent; else drop link
+            parent = el.parent
+            if parent and len(parent.get_text(" ", strip=True)) <= len(txt) + 20:
+                mark(parent)
+            else:
+                mark(el)
+            return False
+        # Short and clearly a navigation snippet
+        if name in ("p", "div", "ul", "ol", "li") and txt and len(txt) <= 60 and _NAV_TEXT.search(txt):
+            mark(el)
+            return False
+        if name in ("button", "a", "span", "div", "p"):
+            id_cls = " ".join([el.get("id", ""), " ".join(el.get("class") or [])])
+            if _BOOKMARK_EXACT.match(txt) or _BOOKMARK_IDCLS.search(id_cls):
+                # If this is inside a larger container that has only this control, drop the container
+                parent = el.parent
+                if parent and len((parent.get_text(" ", strip=True) or "").replace(txt, "").strip()) == 0:
+                    mark(parent)
+                else:
+                    mark(el)
+                return False
+        return True
+
+    _walk(soup, _structural)
+    _walk(soup, _navigation)
 
     # Finally, aggressively strip trailing nav-only nodes at the end of the content
     def _strip_trailing_nav(container):
@@ -459,7 +715,7 @@ def sanitize_article_html(html_fragment: str) -> str:
                     text = node.get_text(" ", strip=True)
                 else:
                     text = str(node).strip()
-                if text and len(text) <= 80 and nav_text_re.search(text):
+                if text and len(text) <= 80 and _NAV_TEXT.search(text):
                     try:
                         node.extract()
                         removed_any = True
@@ -479,66 +735,93 @@ def sanitize_article_html(html_fragment: str) -> str:
         if not _strip_trailing_nav(target):
             break
 
-    # Optional: unwrap containers that only add classes
-    # Keep structure otherwise; return inner HTML if <body> present
-    body = soup.body
-    if body:
-        return "".join(str(c) for c in body.contents)
-    return str(soup)
+    return soup
 
 
 def _norm_text(s: str) -> str:
     """Normalize: trim, lowercase, collapse all whitespace to single spaces for matching."""
-    return re.sub(r"\s+", " ", (s or "").strip().lower())
+    return " ".join((s or "").lower().split())
 
 
-def strip_redundant_headings(title: str, html_fragment: str) -> str:
+def strip_redundant_headings(title: str, html_fragment: Union[str, BeautifulSoup]) -> str:
     """Remove duplicate chapter headings so they don't repeat in the content.
 
     Keeps the first heading that matches the title (or a near match), removes subsequent
-    occurrences across h1/h2/h3. If none match exactly, performs a loose containment check.
+    occurrences across h1/h2/h3, and drops repeated headings with the same level and text.
+    Headings are visited once, in document order.
+    A BeautifulSoup passed in is modified in place instead of being re-parsed.
     """
     try:
-        soup = BeautifulSoup(html_fragment, "lxml")
+        soup = _as_soup(html_fragment)
         want = _norm_text(title)
-        seen = False
-        for tag_name in ["h1", "h2", "h3"]:
-            for h in list(soup.find_all(tag_name)):
-                txt = _norm_text(h.get_text(" ", strip=True))
-                is_match = (txt == want) or (
-                    txt and want and (txt in want or want in txt)
-                )
-                if is_match:
-                    if seen:
-                        h.decompose()
-                    else:
-                        seen = True
-        # If headings still appear more than once verbatim, remove extras by text dedupe
-        seen_texts: Set[str] = set()
-        for tag_name in ["h1", "h2", "h3"]:
-            for h in list(soup.find_all(tag_name)):
-                txt = _norm_text(h.get_text(" ", strip=True))
-                key = f"{tag_name}:{txt}"
-                if txt and key in seen_texts:
+        seen_title = False
+        seen_keys: Set[Tuple[str, str]] = set()
+        for h in soup.find_all(["h1", "h2", "h3"]):
+            if h.decomposed:  # nested inside a heading removed earlier
+                continue
+            txt = _norm_text(h.get_text(" ", strip=True))
+            is_match = (txt == want) or (txt and want and (txt in want or want in txt))
+            if is_match:
+                if seen_title:
                     h.decompose()
-                else:
-                    seen_texts.add(key)
-        body = soup.body
-        return "".join(str(c) for c in body.contents) if body else str(soup)
+                    continue
+                seen_title = True
+            # If headings still appear more than once verbatim, remove extras by text dedupe
+            key = (h.name, txt)
+            if txt and key in seen_keys:
+                h.decompose()
+            else:
+                seen_keys.add(key)
+        return _inner_html(soup)
     except Exception:
+        if isinstance(html_fragment, BeautifulSoup):
+            return _inner_html(html_fragment)
         return html_fragment
 
 
+def _parse_tree(html: str) -> Optional[lxml.html.HtmlElement]:
+    """Parse HTML into a bare lxml tree for read-only scans (links, title).
+
+    Much cheaper than BeautifulSoup because no Python object is built per node; use it where
+    the tree is only read. Returns None for empty/unparseable input.
+    """
+    if not html:
+        return None
+    try:
+        # Parse bytes with an explicit encoding so pages carrying an XML/charset declaration work
+        return lxml.html.document_fromstring(
+            html.encode("utf-8"), parser=lxml.html.HTMLParser(encoding="utf-8")
+        )
+    except (etree.ParserError, ValueError):
+        return None
+
+
+def _iter_hrefs(html: str) -> Iterator[str]:
+    """Yield the href of every <a> that has one, in document order (for link discovery)."""
+    tree = _parse_tree(html)
+    if tree is None:
+        return
+    yield from _HREF_XPATH(tree)
+
+
+def _node_text(el, sep: str = " ") -> str:
+    """Text of an lxml element like BeautifulSoup's get_text(sep, strip=True)."""
+    return sep.join(t.strip() for t in el.itertext() if t.strip())
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
 def extract_lessons_from_book_page(start_url: str, html: str) -> List[str]:
     """Best-effort extraction of chapter/lesson links from a book page.
 
     Strategy: collect all anchors with '/lessons/' or '/topics/' in href, same-domain, keep order of
     appearance, return absolute, de-duplicated list.
     """
-    soup = BeautifulSoup(html, "lxml")
+    tree = _parse_tree(html)
     found: List[str] = []
     seen: Set[str] = set()
-    for a in soup.find_all("a", href=True):
+    if tree is None:
+        return found
+    for a in tree.iter("a"):
         href = a.get("href")
         if not href:
             continue
@@ -557,6 +840,7 @@ def extract_lessons_from_book_page(start_url: str, html: str) -> List[str]:
     return found
 
 
+@st.cache_data(show_spinner=False, max_entries=256)
 def extract_lesson_pairs_from_book_page(start_url: str, html: str) -> List[Tuple[str, str]]:
     """Extract (display_name, absolute_url) pairs for lessons/topics from a book/TOC page.
 
@@ -564,10 +848,12 @@ def extract_lesson_pairs_from_book_page(start_url: str, html: str) -> List[Tuple
     - Preserve order of first appearance and de-duplicate by absolute URL.
     - Display name is normalized anchor text; falls back to URL basename if empty.
     """
-    soup = BeautifulSoup(html, "lxml")
+    tree = _parse_tree(html)
     pairs: List[Tuple[str, str]] = []
     seen: Set[str] = set()
-    for a in soup.find_all("a", href=True):
+    if tree is None:
+        return pairs
+    for a in tree.iter("a"):
         href = a.get("href")
         if not href:
             continue
@@ -581,7 +867,7 @@ def extract_lesson_pairs_from_book_page(start_url: str, html: str) -> List[Tuple
         if abs_link in seen:
             continue
         seen.add(abs_link)
-        txt = (a.get_text(" ", strip=True) or "").strip()
+        txt = _node_text(a).strip()
         if not txt:
             # Fallback to last path segment without query
             try:
@@ -595,13 +881,14 @@ def extract_lesson_pairs_from_book_page(start_url: str, html: str) -> List[Tuple
 def make_epub(
     book_title: str,
     items: List[Tuple[str, str, str]],
+    out_path: str,
     author: Optional[str] = None,
     cover_image: Optional[Tuple[str, bytes]] = None,
-) -> Tuple[bytes, Optional[str]]:
+) -> None:
     """
-    Build an EPUB from items: list of (section_title, url, html_content) -> (bytes, author).
+    Build an EPUB from items: list of (section_title, url, html_content) and write it to out_path.
     Optionally include a cover image.
-    Returns the EPUB data as bytes and the author string.
+    The archive is written straight to the file instead of being assembled in memory first.
     """
     book = epub.EpubBook()
     book.set_title(book_title)
@@ -761,9 +1048,26 @@ def make_epub(
     book.add_item(epub.EpubNcx())
     book.add_item(epub.EpubNav())
 
-    # Write to bytes
-    buf = io.BytesIO()
-    epub.write_epub(buf, book)
+    # Write to a temporary file next to out_path and rename it into place: an existing file
+    # means "already generated" to the callers, so a half-written EPUB (failed write, or the
+    # process killed mid-write) must never appear under the final name. The temporary name is
+    # unique, so batch workers writing books that resolve to the same out_path don't share it.
+    out_dir = os.path.dirname(out_path) or "."
+    # The (author) directory is created only here, when a book is actually written
+    os.makedirs(out_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=os.path.basename(out_path) + ".", suffix=".part", dir=out_dir
+    )
+    os.close(fd)
+    try:
+        epub.write_epub(tmp_path, book, EPUB_WRITE_OPTIONS)
+        # mkstemp creates the file owner-only; give the EPUB normal file permissions
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, out_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
 
     # Debug: Show EPUB structure
     if cover_image:
@@ -780,9 +1084,8 @@ def make_epub(
                 f"🔍 Cover page present: {{'cover.xhtml' in [item.file_name for item in book.items if hasattr(item, 'file_name')]}} "
             )
 
-    return buf.getvalue(), author
-
 
+@st.cache_data(show_spinner=False, max_entries=256)
 def parse_title_author_from_html(
     html: str,
 ) -> Tuple[Optional[str], Optional[str], Optional[str]]:
@@ -791,14 +1094,17 @@ def parse_title_author_from_html(
     raw_full_title is the exact page <title> (or <h1>) text. title_only is the part before the
     separator if found; author is the part after. Any of them may be None if not detected.
     """
-    soup = BeautifulSoup(html, "lxml")
+    tree = _parse_tree(html)
+    if tree is None:
+        return None, None, None
     raw = None
-    if soup.title and soup.title.string:
-        raw = soup.title.string.strip()
+    title_el = tree.find(".//title")
+    if title_el is not None and title_el.text:
+        raw = title_el.text.strip()
     else:
-        h1 = soup.find("h1")
-        if h1:
-            raw = h1.get_text(strip=True)
+        h1 = tree.find(".//h1")
+        if h1 is not None:
+            raw = _node_text(h1, "")
     if not raw:
         return None, None, None
     # Split on dash/en dash surrounded by spaces if possible
@@ -810,17 +1116,14 @@ def parse_title_author_from_html(
     return raw, raw, None
 
 
+@lru_cache(maxsize=4096)
 def fs_safe_basename_from_title(title: str) -> str:
     """Return a filesystem-safe name while preserving Bengali characters.
 
     - Replaces path separators (/, \\) with visually similar fullwidth forms
     - Removes NULs and trims/problematic trailing dots
     """
-    s = (title or "").strip()
-    if not s:
-        return "ebanglalibrary"
-    s = s.replace("/", "／").replace("\\", "＼")
-    s = s.replace("\x00", "")
+    s = (title or "").strip().translate(_FS_TABLE)
     # Avoid trailing spaces or dots which can be problematic on some filesystems
     s = s.strip().rstrip(".")
     return s or "ebanglalibrary"
@@ -831,24 +1134,41 @@ def _bn_text(s: str) -> str:
     return (s or "").strip()
 
 
+@lru_cache(maxsize=128)
+def _author_ctx(author_token: str) -> re.Pattern:
+    """Compiled pattern capturing up to 20 Bengali chars around the author token."""
+    return re.compile(
+        rf"([\u0980-\u09FF\s]{{0,20}}{re.escape(author_token)}[\u0980-\u09FF\s]{{0,20}})"
+    )
+
+
 def derive_author_full(html: str, author_token: Optional[str]) -> Optional[str]:
     if not html or not author_token:
         return author_token
     try:
-        soup = BeautifulSoup(html, "lxml")
-        corpus = soup.get_text(" ", strip=True)
-        if not corpus:
+        tree = _parse_tree(html)
+        if tree is None:
             return author_token
-        # Capture up to 20 Bengali chars around the token
-        pat = re.compile(
-            rf"([\u0980-\u09FF\s]{{0,20}}{re.escape(author_token)}[\u0980-\u09FF\s]{{0,20}})"
-        )
-        matches = pat.findall(corpus)
+        # Only text nodes containing the token are looked at; each is searched within its
+        # enclosing block so names split by inline tags (<b>নাম</b> পদবি) stay together
+        ctx = _author_ctx(author_token)
+        matches: List[str] = []
+        blocks = set()
+        for text in tree.xpath("//text()[contains(., $tok)]", tok=author_token):
+            block = text.getparent()
+            if text.is_tail:
+                block = block.getparent()
+            while block.tag in _INLINE_TAGS and block.getparent() is not None:
+                block = block.getparent()
+            if block.tag in ("script", "style") or block in blocks:
+                continue
+            blocks.add(block)
+            matches.extend(ctx.findall(_node_text(block)))
         if not matches:
             return author_token
         # Pick the longest match as likely full name context
         cand = max(matches, key=lambda x: len(x))
-        cand = re.sub(r"\s+", " ", cand).strip()
+        cand = " ".join(cand.split())
         # Trim to at most 4 Bengali words
         words = cand.split()
         if len(words) > 4:
@@ -861,8 +1181,11 @@ def derive_author_full(html: str, author_token: Optional[str]) -> Optional[str]:
 def page_indicates_edited(html: str) -> bool:
     if not html:
         return False
-    text = BeautifulSoup(html, "lxml").get_text(" ", strip=True)
-    return any(tok in text for tok in ["সম্পাদিত", "সম্পাদক", "সম্পাদনা"])
+    # Cheap test on the raw page first; tags are stripped only when a token occurs at all
+    if not any(tok in html for tok in _EDITED_TOKENS):
+        return False
+    text = _TAG_RE.sub(" ", html)
+    return any(tok in text for tok in _EDITED_TOKENS)
 
 
 def build_output_basename(
@@ -892,21 +1215,38 @@ def _clean_link(base_url: str, href: str) -> Optional[str]:
         return None
     if href.startswith("mailto:") or href.startswith("tel:"):
         return None
-    href = urljoin(base_url, href)
-    href, _frag = urldefrag(href)
-    # basic asset filter
-    if re.search(
-        r"\.(jpg|jpeg|png|gif|svg|pdf|zip|rar|7z|mp3|mp4|avi|webm)(?:\?|$)", href, re.I
-    ):
+    href = urljoin(base_url, href).split("#", 1)[0]
+    # basic asset filter: extension of the path (query string dropped)
+    if href.split("?", 1)[0].rpartition(".")[2].lower() in _ASSET_EXTS:
         return None
     return href
 
 
+# URL parsing for link filtering is cached: the same nav/footer/pagination hrefs repeat on
+# every crawled page, and the start URL is compared against every link
+@lru_cache(maxsize=4096)
+def _url_netloc(url: str) -> str:
+    return urlparse(url).netloc
+
+
+@lru_cache(maxsize=4096)
+def _url_path_dec(url: str) -> str:
+    """Percent-decoded path of a URL."""
+    return unquote(urlparse(url).path or "")
+
+
 def _same_domain(u1: str, u2: str) -> bool:
     """Check if two URLs share the same network location (host:port)."""
-    return urlparse(u1).netloc == urlparse(u2).netloc
+    return _url_netloc(u1) == _url_netloc(u2)
+
+
+@lru_cache(maxsize=64)
+def _compile(pat: str) -> Optional[re.Pattern]:
+    """Compiled user-supplied filter regex (None when empty), reused across reruns."""
+    return re.compile(pat) if pat else None
 
 # New helper: derive a friendly name from URL path when no title/name available
+@lru_cache(maxsize=4096)
 def pretty_display_name_from_url(u: str) -> str:
     try:
         p = urlparse(u)
@@ -926,17 +1266,22 @@ def discover_links(
     include_pattern: str = "",
     exclude_pattern: str = "",
     max_pages: int = 100,
-) -> List[str]:
+    max_workers: int = FETCH_WORKERS,
+) -> Tuple[List[str], Optional[str]]:
     """Discover chapter/article links from a TOC/start page.
 
     First, try to detect a book page and extract '/lessons/' chapter links in-page.
     If that yields results, return them directly (ordered, de-duplicated).
     Otherwise, fall back to a bounded BFS crawl with optional regex filters.
+    Each BFS level is downloaded with up to max_workers parallel requests.
+
+    Returns (links, start page HTML or None) so callers can reuse the start page.
     """
-    include_re = re.compile(include_pattern) if include_pattern else None
-    exclude_re = re.compile(exclude_pattern) if exclude_pattern else None
+    include_re = _compile(include_pattern)
+    exclude_re = _compile(exclude_pattern)
 
     # 1) Free path for books: extract lessons directly from the start page
+    start_html: Optional[str] = None
     try:
         start_html = fetch_html(start_url)
         lessons = extract_lessons_from_book_page(start_url, start_html)
@@ -949,75 +1294,104 @@ def discover_links(
             if not allow_outside:
                 lessons = [u for u in lessons if _same_domain(start_url, u)]
             # cap
-            return lessons[:max_pages]
+            return lessons[:max_pages], start_html
     except Exception:
         pass
 
-    # 2) Fallback: BFS crawl
-    queue: Deque[Tuple[str, int]] = deque([(start_url, 0)])
+    # 2) Fallback: BFS crawl, one level at a time so each level's pages download in parallel
+    level: List[str] = [start_url]
+    depth = 0
     visited_pages: Set[str] = set()
     found: List[str] = []
-
-    while queue and len(visited_pages) < max_pages:
-        url, depth = queue.popleft()
-        if url in visited_pages:
-            continue
-        visited_pages.add(url)
-        try:
-            html = fetch_html(url)
-        except Exception:
-            continue
-        soup = BeautifulSoup(html, "lxml")
-
-        # collect links on this page
-        for a in soup.find_all("a", href=True):
-            link = _clean_link(url, a.get("href"))
-            if not link:
-                continue
-            if not allow_outside and not _same_domain(start_url, link):
-                continue
-            if include_re and not include_re.search(link):
-                continue
-            if exclude_re and exclude_re.search(link):
+    found_set: Set[str] = set()
+
+    while level and len(visited_pages) < max_pages:
+        batch = [u for u in dict.fromkeys(level) if u not in visited_pages]
+        batch = batch[: max_pages - len(visited_pages)]
+        if depth == 0 and start_html is not None:
+            # The start page was already downloaded above
+            pages = {start_url: start_html}
+        else:
+            pages = fetch_many(batch, max_workers=max_workers)
+            if start_html is None:
+                start_html = pages.get(start_url)
+        level = []
+        # The next level can visit at most this many pages; once that many distinct new
+        # neighbors are queued, further ones would be cut anyway
+        budget = max_pages - len(visited_pages) - len(batch)
+        skip = set(batch)  # queued or about to be visited
+        # Pages are processed in queue order, exactly as a FIFO BFS would
+        for url in batch:
+            visited_pages.add(url)
+            html = pages.get(url)
+            if html is None:
                 continue
-            # Heuristic: prefer links with text suggesting chapters/entries
-            link_text = (a.get_text(strip=True) or "").lower()
-            if link not in found:
-                found.append(link)
-
-        # enqueue neighbors for BFS up to max_depth
-        if depth < max_depth:
-            # limit enqueued neighbors to top N per page to avoid explosion
+            # One pass over the page's links: collect them, and enqueue neighbors for BFS up
+            # to max_depth (limited to the first N per page to avoid explosion)
+            enqueue = depth < max_depth and len(level) < budget
             neighbors_added = 0
-            for a in soup.find_all("a", href=True):
-                link = _clean_link(url, a.get("href"))
+            cleaned: Dict[str, Optional[str]] = {}  # raw href -> _clean_link result, per page
+            for href in _iter_hrefs(html):
+                if href in cleaned:
+                    link = cleaned[href]
+                else:
+                    link = cleaned[href] = _clean_link(url, href)
                 if not link:
                     continue
-                if link in visited_pages:
-                    continue
                 if not allow_outside and not _same_domain(start_url, link):
                     continue
                 if include_re and not include_re.search(link):
                     continue
                 if exclude_re and exclude_re.search(link):
                     continue
-                queue.append((link, depth + 1))
-                neighbors_added += 1
-                if neighbors_added >= 50:
-                    break
+                if link not in found_set:
+                    found_set.add(link)
+                    found.append(link)
+                if enqueue and neighbors_added < 50 and link not in visited_pages:
+                    neighbors_added += 1
+                    if link not in skip:
+                        skip.add(link)
+                        level.append(link)
+                        enqueue = len(level) < budget
+        depth += 1
 
     # Remove the start page itself if present
     found = [u for u in found if u != start_url]
 
-    # Simple stable sort: by URL path length then lexicographic
-    found.sort(key=lambda u: (len(urlparse(u).path), u))
-    return found[:max_pages]
+    # Simple stable sort: by URL path length then lexicographic; only the first max_pages
+    # are needed, so select them instead of sorting everything (each URL parsed once)
+    path_len = {u: len(urlparse(u).path) for u in found}
+    return heapq.nsmallest(max_pages, found, key=lambda u: (path_len[u], u)), start_html
+
+
+# Recognize index pages for Books, Authors list, and individual Author pages (decoded paths)
+def _is_books_index_path(path_dec: str) -> bool:
+    return _BOOKS_IDX_RE.match(path_dec) is not None
+
+
+def _is_authors_index_path(path_dec: str) -> bool:
+    return _AUTHORS_IDX_RE.match(path_dec) is not None
+
+
+def _is_index_path(path_dec: str) -> bool:
+    return _is_books_index_path(path_dec) or _is_authors_index_path(path_dec)
+
+
+def _is_author_detail_index_path(path_dec: str) -> bool:
+    # Author detail page (optionally paginated): /authors/<slug>/[page/N]
+    return _AUTHOR_DETAIL_RE.match(path_dec) is not None
+
+
+def _looks_like_book_page_path(path_dec: str) -> bool:
+    # Book detail pages generally live under /books/... or /book/...
+    return "/book" in path_dec and _BOOK_PATH_RE.search(path_dec) is not None
 
 
 def discover_books_from_index(
     index_url: str,
     max_books: int = 500,
     max_index_pages: int = 20,
+    max_workers: int = FETCH_WORKERS,
 ) -> List[str]:
     """Discover individual book pages from:
     - The Books index (and its pagination), or
@@ -1028,94 +1402,220 @@ def discover_books_from_index(
     - Treat pages whose path matches "/books/" or "/books/page/<n>/" as index pages
     - Collect links that include "/books/" but are not index pages themselves
     - Keep order of discovery and de-duplicate
+    - Download each level of index pages with up to max_workers parallel requests
     """
 
-    # Recognize index pages for Books, Authors list, and individual Author pages (decoded paths)
-    def _is_books_index_path(path_dec: str) -> bool:
-        return re.match(r"^/books/(?:page/\d+/?)?$", path_dec) is not None
-
-    def _is_authors_index_path(path_dec: str) -> bool:
-        return re.match(r"^/authors/(?:page/\d+/?)?$", path_dec) is not None
-
-    def _is_index_path(path_dec: str) -> bool:
-        return _is_books_index_path(path_dec) or _is_authors_index_path(path_dec)
-
-    def _is_author_detail_index_path(path_dec: str) -> bool:
-        # Author detail page (optionally paginated): /authors/<slug>/[page/N]
-        return re.match(r"^/authors/[^/]+/(?:page/\d+/?)?$", path_dec) is not None
-
-    def _looks_like_book_page_path(path_dec: str) -> bool:
-        # Book detail pages generally live under /books/... or /book/...
-        if "/books/" in path_dec:
-            return True
-        if re.search(r"/book(?:s)?/", path_dec):
-            return True
-        return False
-
-    start_path_dec = unquote(urlparse(index_url).path or "")
+    start_path_dec = _url_path_dec(index_url)
     starting_author_detail = _is_author_detail_index_path(start_path_dec)
 
-    queue: Deque[str] = deque([index_url])
+    # Index pages are crawled breadth-first, one level at a time so each level downloads in
+    # parallel; pages are still processed in queue order
+    level: List[str] = [index_url]
     visited_index_pages: Set[str] = set()
     found_books: List[str] = []
     seen_books: Set[str] = set()
 
     while (
-        queue
+        level
         and len(visited_index_pages) < max_index_pages
         and len(found_books) < max_books
     ):
-        page_url = queue.popleft()
-        if page_url in visited_index_pages:
-            continue
-        visited_index_pages.add(page_url)
-        try:
-            html = fetch_html(page_url)
-        except Exception:
-            continue
-        soup = BeautifulSoup(html, "lxml")
-
-        # Collect book links on this index page
-        for a in soup.find_all("a", href=True):
-            link = _clean_link(page_url, a.get("href"))
-            if not link or not _same_domain(index_url, link):
-                continue
-            path_raw = urlparse(link).path or ""
-            path_dec = unquote(path_raw)
-            if not _looks_like_book_page_path(path_dec):
-                continue
-            # Skip index pages themselves; keep only book detail pages
-            if _is_books_index_path(path_dec):
-                continue
-            if link in seen_books:
-                continue
-            seen_books.add(link)
-            found_books.append(link)
+        batch = [u for u in dict.fromkeys(level) if u not in visited_index_pages]
+        batch = batch[: max_index_pages - len(visited_index_pages)]
+        pages = fetch_many(batch, max_workers=max_workers)
+        level = []
+        for page_url in batch:
             if len(found_books) >= max_books:
                 break
-
-        # Discover pagination/index neighbors. If starting from a specific author
-        # page, keep neighbors limited to that same author's pagination only.
-        if len(visited_index_pages) < max_index_pages:
-            for a in soup.find_all("a", href=True):
-                link = _clean_link(page_url, a.get("href"))
+            visited_index_pages.add(page_url)
+            html = pages.get(page_url)
+            if html is None:
+                continue
+            # One pass over the page's links collects book links and pagination/index neighbors
+            follow = len(visited_index_pages) < max_index_pages
+            for href in _iter_hrefs(html):
+                # Every accepted path contains "/book" or "/author". For absolute and
+                # root-relative hrefs without percent-escapes that is visible in the raw href,
+                # so most nav/social links are dropped before any URL parsing.
+                if (
+                    href.startswith(("/", "http:", "https:"))
+                    and "%" not in href
+                    and "/book" not in href
+                    and "/author" not in href
+                ):
+                    continue
+                link = _clean_link(page_url, href)
                 if not link or not _same_domain(index_url, link):
                     continue
-                path_raw = urlparse(link).path or ""
-                path_dec = unquote(path_raw)
-                allow = False
-                if starting_author_detail:
-                    # only allow this author's own pagination pages
-                    allow = _is_author_detail_index_path(path_dec)
+                path_dec = _url_path_dec(link)
+
+                # Collect book links on this index page, skipping index pages themselves
+                if (
+                    len(found_books) < max_books
+                    and _looks_like_book_page_path(path_dec)
+                    and not _is_books_index_path(path_dec)
+                    and link not in seen_books
+                ):
+                    seen_books.add(link)
+                    found_books.append(link)
+
+                # Discover pagination/index neighbors. If starting from a specific author
+                # page, keep neighbors limited to that same author's pagination only.
+                if follow:
+                    allow = False
+                    if starting_author_detail:
+                        # only allow this author's own pagination pages
+                        allow = _is_author_detail_index_path(path_dec)
+                    else:
+                        # from books/authors index, follow index pages and author detail pages
+                        allow = _is_index_path(path_dec) or _is_author_detail_index_path(
+                            path_dec
+                        )
+                    if allow and link not in visited_index_pages:
+                        level.append(link)
+
+    return found_books[:max_books]
+
+
+def epub_output_path(out_base: str, author: Optional[str]) -> str:
+    """Output path for a book: OUTPUT_DIR/<author>/<out_base>.epub, or directly under
+    OUTPUT_DIR when the author is unknown or sanitizes to nothing."""
+    author_dir_name = fs_safe_basename_from_title(author) if author else ""
+    return os.path.join(OUTPUT_DIR, author_dir_name, f"{out_base}.epub")
+
+
+def existing_epub_paths(root: str) -> Set[str]:
+    """Paths of all .epub files under root, gathered in one directory walk."""
+    return {
+        os.path.join(dirpath, fn)
+        for dirpath, _dirs, files in os.walk(root)
+        for fn in files
+        if fn.endswith(".epub")
+    }
+
+
+def process_one_book(
+    book_url: str,
+    per_book_cap: int,
+    extract_covers: bool,
+    limiter: Optional[RateLimiter] = None,
+    existing: Optional[Set[str]] = None,
+    book_html: Optional[str] = None,
+) -> Tuple[Optional[str], List[Tuple[str, str]]]:
+    """Fetch one book page and its chapters, and write the book's EPUB (batch mode).
+
+    Returns (saved_path or None, messages), where messages are (kind, text) pairs for the
+    caller to render: "status" for a note on the batch status line, else the name of an st
+    function. Runs in worker threads, so it does not touch Streamlit itself. `limiter`, shared
+    by all workers, paces the start of each book's downloads (skipped books do not wait); when
+    it is set, the book's requests are also made one at a time.
+    `existing`, if given, is the set of EPUB paths already on disk (see existing_epub_paths);
+    `book_html` is the book page when the caller has already downloaded it.
+    """
+    messages: List[Tuple[str, str]] = []
+    try:
+        if book_html is None:
+            book_html = fetch_html(book_url)
+        raw_full_title, meta_title_only, meta_author = parse_title_author_from_html(
+            book_html
+        )
+        # Determine book title
+        if raw_full_title:
+            book_title = raw_full_title
+        elif meta_title_only:
+            book_title = meta_title_only
+        else:
+            book_title = "eBanglaLibrary Book"
+
+        # Determine output filename early
+        if raw_full_title:
+            out_base = fs_safe_basename_from_title(raw_full_title)
+        else:
+            out_base = build_output_basename(
+                raw_full_title, meta_title_only, meta_author, book_html
+            )
+
+        # Output goes under the author's directory (using meta_author for now)
+        out_path = epub_output_path(out_base, meta_author)
+
+        if DEBUG:
+            messages.append(("info", f"Debug: Checking for existing file at: {out_path}"))
+
+        # Check for existing file before fetching chapters
+        exists = out_path in existing if existing is not None else os.path.exists(out_path)
+        if exists:
+            messages.append(("status", f"Skipping existing file: {out_path}"))
+            return None, messages
+
+        if limiter:
+            limiter.wait(book_url)
+
+        lessons = extract_lessons_from_book_page(book_url, book_html)
+        if not lessons:
+            messages.append(("warning", f"No chapters found for book: {book_url}"))
+            return None, messages
+
+        # Without a request delay the cover is looked up and downloaded in the background while
+        # chapters are fetched, and chapters download in parallel; with one, every request is
+        # made one at a time, like Pack EPUB's throttled crawl
+        cover_future = (
+            _in_background(extract_cover_image, book_html, book_url)
+            if extract_covers and not limiter
+            else None
+        )
+        fetch_workers = 1 if limiter else FETCH_WORKERS
+
+        items: List[Tuple[str, str, str]] = []
+        seen_digests: Set[bytes] = set()
+        # Chapters are parsed in order as they arrive
+        for chap_url, html in fetch_ordered(lessons[:per_book_cap], max_workers=fetch_workers):
+            try:
+                if html is None:
+                    html = fetch_html(chap_url)
+                title, content_html = extract_content(chap_url, html)
+                # The same chapter reached through different URLs is only packed once
+                digest = _content_digest(content_html)
+                if digest in seen_digests:
+                    messages.append(("warning", f"Skipping duplicate page: {chap_url}"))
+                    continue
+                seen_digests.add(digest)
+                items.append((title, chap_url, content_html))
+            except Exception as e:
+                messages.append(("error", f"Failed chapter: {chap_url} ({e})"))
+
+        cover_image: Optional[Tuple[str, bytes]] = None
+        if extract_covers:
+            try:
+                if cover_future is not None:
+                    cover_image = cover_future.result()
                 else:
-                    # from books/authors index, follow index pages and author detail pages
-                    allow = _is_index_path(path_dec) or _is_author_detail_index_path(
-                        path_dec
+                    cover_image = extract_cover_image(book_html, book_url)
+                if cover_image:
+                    img_url, img_data = cover_image
+                    messages.append(
+                        (
+                            "status",
+                            f"🔍 Found cover image for '{book_title}': {img_url.split('/')[-1]} ({len(img_data)} bytes)",
+                        )
                     )
-                if allow and link not in visited_index_pages:
-                    queue.append(link)
+                else:
+                    messages.append(("status", f"🔍 No cover image found for '{book_title}'"))
+            except Exception as e:
+                messages.append(
+                    ("status", f"⚠️ Failed to extract cover image for '{book_title}': {e}")
+                )
 
-    return found_books[:max_books]
+        if not items:
+            messages.append(("warning", f"No chapters extracted for book: {book_url}"))
+        else:
+            make_epub(book_title, items, out_path, author=meta_author, cover_image=cover_image)
+            if existing is not None:
+                existing.add(out_path)
+            messages.append(("write", f"Saved: {out_path}"))
+            return out_path, messages
+    except Exception as e:
+        messages.append(("error", f"Book failed: {book_url} ({e})"))
+    return None, messages
 
 
 with st.sidebar:
@@ -1224,6 +1724,13 @@ with st.sidebar:
     st.subheader("📖 Cover Image Settings")
     extract_covers = st.checkbox("Extract cover images from title pages", value=True)
 
+    # Downloaded pages are cached in memory, and on disk (output/http_cache.sqlite)
+    if st.button("Clear cache", help="Forget downloaded pages so they are fetched again"):
+        _memo_download_html.cache_clear()
+        if _REQUESTS_CACHE_OK:
+            SESSION.cache.clear()
+        st.success("HTTP cache cleared.")
+
 
 # General guidance for new users on when to use each mode
 st.info(
@@ -1238,29 +1745,34 @@ if st.button("Pack EPUB", type="primary"):
         # Parse user-provided URLs line-by-line
         raw_urls = [u.strip() for u in urls_text.splitlines() if u.strip()]
         start_html_for_meta = None
+        start_meta = (None, None, None)
+        name_map: Dict[str, str] = {}
     elif mode == "Crawl from URL":
         # Validate the starting page and run link discovery according to settings
         if not start_url:
             st.warning("Please enter a start URL.")
             st.stop()
         with st.spinner("Discovering chapter links…"):
-            discovered = discover_links(
+            discovered, start_html_for_meta = discover_links(
                 start_url=start_url,
                 max_depth=max_depth,
                 allow_outside=allow_outside,
                 include_pattern=include_pattern,
                 exclude_pattern=exclude_pattern,
                 max_pages=max_pages,
+                max_workers=1 if throttle_min else FETCH_WORKERS,
             )
         if not discovered:
             st.error("No links discovered. Adjust depth/filters and try again.")
             st.stop()
         st.success(f"Discovered {len(discovered)} links.")
-        # Fetch start page html for title/author metadata and names
-        try:
-            start_html_for_meta = fetch_html(start_url)
-        except Exception:
-            start_html_for_meta = None
+        # The start page html from discovery provides title/author metadata and names
+        # (raw_full_title, title_only, author) of the start page, parsed once for this run
+        start_meta = (
+            parse_title_author_from_html(start_html_for_meta)
+            if start_html_for_meta
+            else (None, None, None)
+        )
         name_map = {}
         if start_html_for_meta:
             try:
@@ -1281,11 +1793,14 @@ if st.button("Pack EPUB", type="primary"):
         st.warning("Please provide at least one URL.")
         st.stop()
 
-    urls = []
-    for u in raw_urls:
-        if allow_outside or "ebanglalibrary.com" in u:
-            urls.append(u)
-    urls = list(dict.fromkeys(urls))  # de-dup keep order
+    # Filter to the site (unless allowed) and de-dup keeping order, in one pass
+    seen_urls: Set[str] = set()
+    urls = [
+        u
+        for u in raw_urls
+        if (allow_outside or "ebanglalibrary.com" in u)
+        and not (u in seen_urls or seen_urls.add(u))
+    ]
 
     if not urls:
         st.warning("No valid URLs to process.")
@@ -1293,13 +1808,7 @@ if st.button("Pack EPUB", type="primary"):
 
     # Early skip if target EPUB already exists (Crawl mode)
     if mode == "Crawl from URL":
-        author_meta_early: Optional[str] = None
-        raw_full_title_early: Optional[str] = None
-        meta_title_only_early: Optional[str] = None
-        if "start_html_for_meta" in locals() and start_html_for_meta:
-            raw_full_title_early, meta_title_only_early, meta_author_early = parse_title_author_from_html(start_html_for_meta)
-            if meta_author_early:
-                author_meta_early = meta_author_early
+        raw_full_title_early, meta_title_only_early, author_meta_early = start_meta
 
         if raw_full_title_early:
             out_base_early = fs_safe_basename_from_title(raw_full_title_early)
@@ -1308,17 +1817,10 @@ if st.button("Pack EPUB", type="primary"):
                 raw_full_title_early,
                 meta_title_only_early,
                 author_meta_early,
-                (start_html_for_meta if "start_html_for_meta" in locals() else None),
+                start_html_for_meta,
             )
 
-        final_output_dir_early = OUTPUT_DIR
-        if author_meta_early:
-            author_dir_name_early = fs_safe_basename_from_title(author_meta_early)
-            if author_dir_name_early:
-                final_output_dir_early = os.path.join(OUTPUT_DIR, author_dir_name_early)
-
-        os.makedirs(final_output_dir_early, exist_ok=True)
-        out_path_early = os.path.join(final_output_dir_early, f"{out_base_early}.epub")
+        out_path_early = epub_output_path(out_base_early, author_meta_early)
 
         if DEBUG:
             st.info(f"Debug: (Crawl) Checking for existing file at: {out_path_early}")
@@ -1326,39 +1828,72 @@ if st.button("Pack EPUB", type="primary"):
         if os.path.exists(out_path_early):
             st.write(f"Existing file found: {out_path_early}")
             with open(out_path_early, "rb") as f:
-                existing_data = f.read()
-            st.download_button(
-                label="Download Existing EPUB",
-                data=existing_data,
-                file_name=f"{out_base_early}.epub",
-                mime="application/epub+zip",
-            )
+                st.download_button(
+                    label="Download Existing EPUB",
+                    data=f,
+                    file_name=f"{out_base_early}.epub",
+                    mime="application/epub+zip",
+                )
             st.stop()
 
+    # Throttle requests in Crawl mode
+    limiter = (
+        RateLimiter(throttle_min * 60.0)
+        if mode == "Crawl from URL" and throttle_min
+        else None
+    )
+    # Without a request delay the start page's cover is looked up and downloaded in the
+    # background during the fetches; with one, it is fetched after the pages
+    cover_future = (
+        _in_background(extract_cover_image, start_html_for_meta, start_url)
+        if start_html_for_meta and extract_covers and not limiter
+        else None
+    )
+
     items: List[Tuple[str, str, str]] = []
     progress = st.progress(0)
     status = st.empty()
 
-    for i, url in enumerate(urls, start=1):
+    seen_digests: Set[bytes] = set()
+    page_meta: Dict[str, Tuple[Optional[str], Optional[str], Optional[str]]] = {}
+    # Without a request delay there is nothing to pace, so pages download in parallel and are
+    # parsed in order as they arrive; with one, each page is fetched when its turn comes
+    pages = ((u, None) for u in urls) if limiter else fetch_ordered(urls)
+    get_name = name_map.get
+    status_text = ""
+    last_update = 0.0
+    for i, (url, html) in enumerate(pages, start=1):
         try:
             # Fetch HTML first to derive a friendly display name (Manual mode) or use crawl map
-            html = fetch_html(url)
-            raw_full_title_tmp, meta_title_only_tmp, _ = parse_title_author_from_html(html)
+            if html is None:
+                if limiter:
+                    limiter.wait(url)
+                html = fetch_html(url)
+            page_meta[url] = parse_title_author_from_html(html)
+            raw_full_title_tmp, meta_title_only_tmp, _ = page_meta[url]
             display_name = (
                 raw_full_title_tmp
                 or meta_title_only_tmp
-                or (name_map.get(url) if 'name_map' in locals() else None)
+                or get_name(url)
                 or pretty_display_name_from_url(url)
             )
-            status.write(f"Fetching: {display_name}")
+            status_text = f"Fetching: {display_name}"
             title, content_html = extract_content(url, html)
-            items.append((title, url, content_html))
+            # The same chapter reached through different URLs is only packed once
+            digest = _content_digest(content_html)
+            if digest in seen_digests:
+                st.warning(f"Skipping duplicate page: {url}")
+            else:
+                seen_digests.add(digest)
+                items.append((title, url, content_html))
         except Exception as e:
             st.error(f"Failed: {url} ({e})")
-        # Throttle requests in Crawl mode
-        if mode == "Crawl from URL" and throttle_min:
-            time.sleep(throttle_min * 60.0)
-        progress.progress(i / len(urls))
+        now = time.monotonic()
+        if now - last_update >= STATUS_INTERVAL or i == len(urls):
+            if status_text:
+                status.write(status_text)
+            progress.progress(i / len(urls))
+            last_update = now
 
     if not items:
         st.error("No items extracted. Please check the URLs.")
@@ -1370,10 +1905,8 @@ if st.button("Pack EPUB", type="primary"):
     raw_full_title: Optional[str] = None
     cover_image: Optional[Tuple[str, bytes]] = None
 
-    if "start_html_for_meta" in locals() and start_html_for_meta:
-        raw_full_title, meta_title_only, meta_author = parse_title_author_from_html(
-            start_html_for_meta
-        )
+    if start_html_for_meta:
+        raw_full_title, meta_title_only, meta_author = start_meta
         # Document name should be exactly the page title
         if raw_full_title:
             book_title = raw_full_title
@@ -1381,12 +1914,13 @@ if st.button("Pack EPUB", type="primary"):
             book_title = meta_title_only
         if meta_author:
             author_meta = meta_author
-        # Try to extract cover image from the start page
+        # Collect the cover image from the start page
         if extract_covers:
             try:
-                if DEBUG:
-                    st.info("Debug: Attempting cover extraction from start page")
-                cover_image = extract_cover_image(start_html_for_meta, start_url)
+                if cover_future is not None:
+                    cover_image = cover_future.result()
+                else:
+                    cover_image = extract_cover_image(start_html_for_meta, start_url)
                 if cover_image:
                     img_url, img_data = cover_image
                     st.success(
@@ -1404,7 +1938,9 @@ if st.button("Pack EPUB", type="primary"):
             first_title, _html = None, None
             # fetch first url to get title
             _html = fetch_html(raw_urls[0])
-            raw_full, first_title, _author = parse_title_author_from_html(_html)
+            raw_full, first_title, _author = page_meta.get(
+                raw_urls[0]
+            ) or parse_title_author_from_html(_html)
             book_title = raw_full or first_title or "eBanglaLibrary Collection"
 
             # Try to extract cover image from the first page if we don't have one
@@ -1452,57 +1988,46 @@ if st.button("Pack EPUB", type="primary"):
         if cover_image
         else "🔨 Building EPUB without cover image..."
     )
-    data, author = make_epub(
-        book_title, items, author=author_meta, cover_image=cover_image
-    )
-
     # Output filename: if page has a full title, use it verbatim; else construct a best-effort name
     if raw_full_title:
         out_base = fs_safe_basename_from_title(raw_full_title)
     else:
         out_base = build_output_basename(
             raw_full_title,
-            (meta_title_only if "meta_title_only" in locals() else None),
+            start_meta[1],
             author_meta,
-            (start_html_for_meta if "start_html_for_meta" in locals() else None),
+            start_html_for_meta,
         )
 
-    # Determine output directory based on author
-    final_output_dir = OUTPUT_DIR
-    if author:
-        # Sanitize author name for directory path
-        author_dir_name = fs_safe_basename_from_title(author)
-        if author_dir_name:
-            final_output_dir = os.path.join(OUTPUT_DIR, author_dir_name)
-
-    os.makedirs(final_output_dir, exist_ok=True)
-    out_path = os.path.join(final_output_dir, f"{out_base}.epub")
+    # Output goes under the author's directory
+    out_path = epub_output_path(out_base, author_meta)
 
     if DEBUG:
         st.info(f"Debug: Checking for existing file at: {out_path}")
 
-    # Check for existing file before fetching chapters
+    # Check for existing file before building the EPUB
     if os.path.exists(out_path):
         st.write(f"Existing file found: {out_path}")
         with open(out_path, "rb") as f:
-            existing_data = f.read()
+            st.download_button(
+                label=f"Download Existing EPUB",
+                data=f,
+                file_name=f"{out_base}.epub",
+                mime="application/epub+zip",
+            )
+        st.stop()
+
+    make_epub(
+        book_title, items, out_path, author=author_meta, cover_image=cover_image
+    )
+    # The download button reads the file that was just written; no copy is kept here
+    with open(out_path, "rb") as f:
         st.download_button(
-            label=f"Download Existing EPUB",
-            data=existing_data,
+            label="Download EPUB",
+            data=f,
             file_name=f"{out_base}.epub",
             mime="application/epub+zip",
         )
-        st.stop()
-
-    with open(out_path, "wb") as f:
-        f.write(data)
-
-    st.download_button(
-        label="Download EPUB",
-        data=data,
-        file_name=f"{out_base}.epub",
-        mime="application/epub+zip",
-    )
     st.write(f"Saved to: {out_path}")
 
 
@@ -1517,13 +2042,12 @@ if mode == "Batch from Books Index" and st.button(
         st.warning("Please enter the books index URL.")
         st.stop()
 
-    generated_count = 0
-    saved_files = []
     with st.spinner("Discovering books from index…"):
         book_urls = discover_books_from_index(
             index_url=index_url,
             max_books=max_books,
             max_index_pages=max_index_pages,
+            max_workers=1 if throttle_min else FETCH_WORKERS,
         )
 
     if not book_urls:
@@ -1532,11 +2056,13 @@ if mode == "Batch from Books Index" and st.button(
 
     st.success(f"Discovered {len(book_urls)} book(s).")
     with st.spinner("Resolving book titles…"):
+        # Book pages are downloaded once (in parallel unless a request delay is set) and handed
+        # to the book workers below
+        book_pages = fetch_many(book_urls, max_workers=1 if throttle_min else FETCH_WORKERS)
         book_titles: List[str] = []
         for bu in book_urls:
             try:
-                bh = fetch_html(bu)
-                rf, to, _ = parse_title_author_from_html(bh)
+                rf, to, _ = parse_title_author_from_html(book_pages[bu])
                 nm = rf or to or pretty_display_name_from_url(bu)
             except Exception:
                 nm = pretty_display_name_from_url(bu)
@@ -1548,133 +2074,53 @@ if mode == "Batch from Books Index" and st.button(
     status = st.empty()
     saved_files: List[str] = []
 
-    for b_idx, book_url in enumerate(book_urls, start=1):
-        if DEBUG:
-            st.info(f"Debug: Processing book {b_idx}: {book_url}")
-        try:
-            status.write(f"Book {b_idx}/{len(book_urls)}: {book_title}")
-            book_html = fetch_html(book_url)
-            raw_full_title, meta_title_only, meta_author = parse_title_author_from_html(
-                book_html
-            )
-            # Determine book title
-            if raw_full_title:
-                book_title = raw_full_title
-            elif meta_title_only:
-                book_title = meta_title_only
-            else:
-                book_title = "eBanglaLibrary Book"
-                
-            # Determine output filename early
-            if raw_full_title:
-                out_base = fs_safe_basename_from_title(raw_full_title)
-            else:
-                out_base = build_output_basename(
-                    raw_full_title, meta_title_only, meta_author, book_html
-                )
-
-            # Determine output directory based on author (using meta_author for now)
-            final_output_dir = OUTPUT_DIR
-            if meta_author:
-                # Sanitize author name for directory path
-                author_dir_name = fs_safe_basename_from_title(meta_author)
-                if author_dir_name:
-                    final_output_dir = os.path.join(OUTPUT_DIR, author_dir_name)
-
-            os.makedirs(final_output_dir, exist_ok=True)
-            out_path = os.path.join(final_output_dir, f"{out_base}.epub")
-
-            if DEBUG:
-                st.info(f"Debug: Checking for existing file at: {out_path}")
-
-            # Check for existing file before fetching chapters
-            if os.path.exists(out_path):
-                status.write(f"Skipping existing file: {out_path}")
-                continue
-
-            # Try to extract cover image from the book page
-            cover_image: Optional[Tuple[str, bytes]] = None
-            if extract_covers:
-                try:
-                    if DEBUG:
-                        st.info(
-                            f"Debug: Attempting cover extraction for book {book_title}"
-                        )
-                    cover_image = extract_cover_image(book_html, book_url)
-                    if cover_image:
-                        img_url, img_data = cover_image
-                        status.write(
-                            f"🔍 Found cover image for '{book_title}': {img_url.split('/')[-1]} ({len(img_data)} bytes)"
-                        )
-                    else:
-                        status.write(f"🔍 No cover image found for '{book_title}'")
-                except Exception as e:
-                    status.write(
-                        f"⚠️ Failed to extract cover image for '{book_title}': {e}"
-                    )
-
-            # Build lesson name map and discover chapter links from this book page
-            try:
-                pairs = extract_lesson_pairs_from_book_page(book_url, book_html)
-                lesson_name_map = {url: name for (name, url) in pairs}
-            except Exception:
-                lesson_name_map = {}
-            lessons = extract_lessons_from_book_page(book_url, book_html)
-            if not lessons:
-                st.warning(f"No chapters found for book: {book_url}")
-                overall.progress(b_idx / len(book_urls))
-                time.sleep(throttle_min * 60.0)
-                continue
-
-            lessons = lessons[:per_book_cap]
-
-            items: List[Tuple[str, str, str]] = []
-            for i, chap_url in enumerate(lessons, start=1):
-                try:
-                    display_name = lesson_name_map.get(chap_url) or pretty_display_name_from_url(chap_url)
-                    status.write(f"Fetching chapter {i}/{len(lessons)}: {display_name}")
-                    html = fetch_html(chap_url)
-                    title, content_html = extract_content(chap_url, html)
-                    items.append((title, chap_url, content_html))
-                except Exception as e:
-                    st.error(f"Failed chapter: {chap_url} ({e})")
-
-            if not items:
-                st.warning(f"No chapters extracted for book: {book_url}")
-                overall.progress(b_idx / len(book_urls))
-                time.sleep(throttle_min * 60.0)
-                continue
-
-            data, author = make_epub(
-                book_title, items, author=meta_author, cover_image=cover_image
-            )
-
-            # Update output directory if author from make_epub is different from meta_author
-            if author and author != meta_author:
-                final_output_dir = OUTPUT_DIR
-                author_dir_name = fs_safe_basename_from_title(author)
-                if author_dir_name:
-                    final_output_dir = os.path.join(OUTPUT_DIR, author_dir_name)
-                    os.makedirs(final_output_dir, exist_ok=True)
-                    out_path = os.path.join(final_output_dir, f"{out_base}.epub")
-                    
-                    # Re-check if file exists in the new author directory
-                    if DEBUG:
-                        st.info(f"Debug: Re-checking for existing file at new path: {out_path}")
-                    if os.path.exists(out_path):
-                        status.write(f"Skipping existing file: {out_path}")
-                        continue
-
-            with open(out_path, "wb") as f:
-                f.write(data)
-
-            generated_count += 1
-            saved_files.append(out_path)
-            st.write(f"Saved: {out_path}")
-        except Exception as e:
-            st.error(f"Book failed: {book_url} ({e})")
-        overall.progress(b_idx / len(book_urls))
-        time.sleep(throttle_min * 60.0)
+    # Books are independent, so several are processed at once. With a request delay they run
+    # one at a time (one request in flight), and the delay spaces out the start of each book's
+    # downloads instead of sleeping after every book
+    workers = 1 if throttle_min else min(BATCH_WORKERS, len(book_urls))
+    limiter = RateLimiter(throttle_min * 60.0) if throttle_min else None
+    # One walk of the output tree instead of a stat per book
+    existing = existing_epub_paths(OUTPUT_DIR)
+    # The pool is shut down without waiting: if Streamlit stops or reruns the script, the next
+    # st.* call raises, and queued books must be cancelled rather than run to completion
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = {
+            pool.submit(
+                process_one_book,
+                book_url,
+                per_book_cap,
+                extract_covers,
+                limiter,
+                existing,
+                book_pages.get(book_url),
+            ): b_idx
+            for b_idx, book_url in enumerate(book_urls)
+        }
+        last_update = 0.0
+        # Most recent status note not yet shown; kept across skipped redraws
+        last_note = ""
+        for done, fut in enumerate(as_completed(futures), start=1):
+            b_idx = futures[fut]
+            saved_path, messages = fut.result()
+            # Worker output is rendered here, on the script thread; of the status notes only the
+            # last one would survive the "Finished" line, so it is appended to that line instead
+            for kind, text in messages:
+                if kind == "status":
+                    last_note = text
+                else:
+                    getattr(st, kind)(text)
+            if saved_path:
+                saved_files.append(saved_path)
+            now = time.monotonic()
+            if now - last_update >= STATUS_INTERVAL or done == len(book_urls):
+                line = f"Finished book {done}/{len(book_urls)}: {book_titles[b_idx]}"
+                status.write(f"{line} — {last_note}" if last_note else line)
+                overall.progress(done / len(book_urls))
+                last_update = now
+                last_note = ""
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
 
     if saved_files:
         st.success(f"Generated {len(saved_files)} EPUB file(s).")